@@ -1,15 +1,31 @@
 import sys
 import re
+import os
+import time
+import json
+import heapq
+import math
+import csv
+import random
+import secrets
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from PyQt6.QtWidgets import QApplication, QMainWindow, QPushButton, QFileDialog, QVBoxLayout, QWidget, QLineEdit, \
     QLabel, QSpinBox, QMessageBox, QCheckBox, QTabWidget, QSizePolicy, QTextEdit, QInputDialog, QProgressBar, \
-    QHBoxLayout
-from PyQt6.QtCore import Qt, QThread, pyqtSignal
+    QHBoxLayout, QTableWidget, QTableWidgetItem, QListWidget, QComboBox
+from PyQt6.QtCore import Qt, QThread, pyqtSignal, QObject, QFileSystemWatcher, QTimer
 from PyQt6.QtGui import QColor, QPalette
 import subprocess
 import ast
 from matplotlib.font_manager import FontProperties
 import matplotlib.pyplot as plt
 import matplotlib
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_qtagg import FigureCanvasQTAgg
+from alchemy_overlay import OVERLAY_ENV
+from alchemy_data import SERVER_ENV, AUTHKEY_ENV
+from alchemy_report import draw_combined_metrics, draw_separate_metrics, separate_figsize, render_run, \
+    write_batch_report
 
 # 设置中文字体
 plt.rcParams['font.sans-serif'] = ['SimHei']  # 使用黑体
@@ -77,6 +93,25 @@ def get_config_attributes(file_path):
     return config_attrs
 
 
+def get_config_literal_attributes(file_path):
+    # get_config_attributes 对非字面量的属性返回 None，这里找出真正的字面量属性
+    with open(file_path, 'r', encoding='utf-8') as file:
+        tree = ast.parse(file.read(), filename=file_path)
+
+    literal_attrs = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.ClassDef) and node.name == 'Config':
+            for body_item in node.body:
+                if isinstance(body_item, ast.FunctionDef) and body_item.name == '__init__':
+                    for stmt in body_item.body:
+                        if isinstance(stmt, ast.Assign) and isinstance(stmt.value, ast.Constant):
+                            for target in stmt.targets:
+                                if isinstance(target, ast.Attribute) and isinstance(target.value, ast.Name) \
+                                        and target.value.id == 'self':
+                                    literal_attrs.add(target.attr)
+    return literal_attrs
+
+
 def get_dict_attributes(file_path):
     with open(file_path, 'r', encoding='utf-8') as file:
         tree = ast.parse(file.read(), filename=file_path)
@@ -98,6 +133,344 @@ def get_dict_attributes(file_path):
     return dict_attrs
 
 
+def parse_value(text):
+    try:
+        return ast.literal_eval(text)
+    except (ValueError, SyntaxError):
+        return text
+
+
+def coerce_value(text, original):
+    # 按源码中原始值的类型解析输入，字符串参数保持为字符串
+    if isinstance(original, str):
+        return text
+    value = parse_value(text)
+    if isinstance(original, float) and isinstance(value, int) and not isinstance(value, bool):
+        return float(value)
+    return value
+
+
+def is_changed(value, original):
+    return type(value) is not type(original) or value != original
+
+
+def get_data_size(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path)
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def format_duration(seconds):
+    seconds = int(round(seconds))
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+
+def schedule_longest_first(jobs, slots):
+    # 按预计耗时从长到短排序（LPT），并模拟分配到各并行槽位以估算总耗时
+    ordered = sorted(jobs, key=lambda job: (job['estimate'] or 0, job['data_size']), reverse=True)
+    if any(job['estimate'] is None for job in ordered):
+        return ordered, None
+    loads = [0.0] * max(1, slots)
+    for job in ordered:
+        heapq.heappush(loads, heapq.heappop(loads) + job['estimate'])
+    return ordered, max(loads)
+
+
+class RunHistory:
+    def __init__(self, file_path='run_history.json', keep=5):
+        self.file_path = file_path
+        self.keep = keep  # 每个运行键保留的最近耗时条数
+        self.records = {}
+        if os.path.exists(file_path):
+            try:
+                with open(file_path, 'r', encoding='utf-8') as file:
+                    self.records = json.load(file)
+            except (OSError, ValueError):
+                self.records = {}
+
+    @staticmethod
+    def make_key(script_path, train_data_path, test_data_path, params=None):
+        return json.dumps([os.path.abspath(script_path), train_data_path, test_data_path, params or {}],
+                          sort_keys=True, ensure_ascii=False)
+
+    def record(self, key, duration, data_size):
+        record = self.records.setdefault(key, {'durations': [], 'data_size': data_size})
+        record['durations'] = (record['durations'] + [duration])[-self.keep:]
+        record['data_size'] = data_size
+        with open(self.file_path, 'w', encoding='utf-8') as file:
+            json.dump(self.records, file, ensure_ascii=False, indent=2)
+
+    def estimate(self, key, data_size):
+        # 优先使用同一被试/配置的历史耗时，否则按数据量与历史平均速率估算
+        if key in self.records and self.records[key]['durations']:
+            durations = self.records[key]['durations']
+            return sum(durations) / len(durations)
+        total_time = total_size = 0
+        for record in self.records.values():
+            if record['durations'] and record['data_size'] > 0:
+                total_time += sum(record['durations']) / len(record['durations'])
+                total_size += record['data_size']
+        if total_size > 0 and data_size > 0:
+            return total_time / total_size * data_size
+        return None
+
+
+class MetricStream:
+    epoch_pattern = re.compile(r'Epoch\s*[:=]\s*(\d+)(?:\s*/\s*(\d+))?')
+    metric_pattern = re.compile(r'([a-zA-Z_ ]+)\s*[:=]\s*([\d.]+)')
+
+    def __init__(self):
+        self.epochs = []
+        self.metrics = {}
+        self.metric_epochs = {}  # 每个指标值记录时所在的epoch
+        self.total_epochs = None  # 从 "Epoch: 3/100" 形式的输出中检测
+
+    def feed(self, line):
+        # 逐行解析输出，返回新的epoch（若该行为epoch行）
+        epoch_match = self.epoch_pattern.search(line)
+        if epoch_match:
+            epoch = int(epoch_match.group(1))
+            if epoch_match.group(2):
+                self.total_epochs = int(epoch_match.group(2))
+            self.epochs.append(epoch)
+            return epoch
+
+        for match in self.metric_pattern.finditer(line):
+            key, value = match.groups()
+            key = key.strip().replace(" ", "_")
+            try:
+                value = float(value)
+            except ValueError:
+                continue
+            if key not in self.metrics:
+                self.metrics[key] = []
+                self.metric_epochs[key] = []
+            self.metrics[key].append(value)
+            self.metric_epochs[key].append(self.epochs[-1] if self.epochs else len(self.metrics[key]))
+        return None
+
+    def plot_metrics(self):
+        return {k: v for k, v in self.metrics.items() if len(v) > 1}
+
+    def summary(self):
+        # 每个指标的最终值、最优值及最优epoch
+        summary = {}
+        for key, values in self.metrics.items():
+            if metric_mode(key) == 'min':
+                best_idx = min(range(len(values)), key=values.__getitem__)
+            else:
+                best_idx = max(range(len(values)), key=values.__getitem__)
+            summary[key] = {'final': values[-1], 'best': values[best_idx],
+                            'best_epoch': self.metric_epochs[key][best_idx]}
+        return summary
+
+
+def metric_mode(key):
+    key = key.lower()
+    return 'min' if 'loss' in key or 'err' in key else 'max'
+
+
+class RunningStats:
+    __slots__ = ('n', 'mean', 'm2', 'min', 'max')
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value):
+        # Welford在线更新，不需要保存每次运行的数值
+        self.n += 1
+        delta = value - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (value - self.mean)
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    @property
+    def std(self):
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else 0.0
+
+
+class ProgressTracker:
+    def __init__(self, total_runs, total_epochs=0, smoothing=0.3):
+        self.total_runs = total_runs
+        self.total_epochs = total_epochs or None  # 0 表示从输出中自动检测
+        self.smoothing = smoothing
+        self.completed_runs = 0
+        self.runs = {}
+
+    def start_run(self, run_id, now=None):
+        now = time.monotonic() if now is None else now
+        self.runs[run_id] = {'last_time': now, 'done': 0, 'offset': None, 'total': self.total_epochs, 'rate': None}
+
+    def update(self, run_id, epoch, total=None, now=None):
+        # 按解析出的epoch编号（取最大值）计进度，重复或刷新的epoch行（如tqdm）不会重复计数
+        state = self.runs.get(run_id)
+        if state is None:
+            return
+        if total and not self.total_epochs:
+            state['total'] = total
+        if state['offset'] is None:
+            state['offset'] = 1 if epoch == 0 else 0  # 兼容从0开始编号的epoch
+        done = epoch + state['offset']
+        if done <= state['done']:
+            return
+
+        # 按指数滑动平均更新吞吐量（epoch/min）
+        now = time.monotonic() if now is None else now
+        elapsed = now - state['last_time']
+        advanced = done - state['done']
+        state['last_time'] = now
+        state['done'] = done
+        if elapsed > 0:
+            rate = 60.0 * advanced / elapsed
+            state['rate'] = rate if state['rate'] is None else \
+                self.smoothing * rate + (1 - self.smoothing) * state['rate']
+
+    def finish_run(self, run_id):
+        if self.runs.pop(run_id, None) is not None:
+            self.completed_runs += 1
+
+    def run_fraction(self, state):
+        if not state['total']:
+            return 0.0
+        return min(1.0, state['done'] / state['total'])
+
+    def run_eta(self, state):
+        if not state['total'] or not state['rate']:
+            return None
+        return max(0, state['total'] - state['done']) / state['rate'] * 60
+
+    def batch_fraction(self):
+        running = sum(self.run_fraction(state) for state in self.runs.values())
+        return min(1.0, (self.completed_runs + running) / max(1, self.total_runs))
+
+    def batch_rate(self):
+        return sum(state['rate'] or 0 for state in self.runs.values())
+
+    def batch_eta(self):
+        # 剩余epoch数除以所有运行中任务的总吞吐量
+        totals = [state['total'] for state in self.runs.values() if state['total']]
+        per_run = self.total_epochs or (max(totals) if totals else None)
+        rate = self.batch_rate()
+        if not per_run or not rate:
+            return None
+        queued = self.total_runs - self.completed_runs - len(self.runs)
+        remaining = sum(max(0, (state['total'] or per_run) - state['done']) for state in self.runs.values())
+        return (remaining + queued * per_run) / rate * 60
+
+
+class ResultAggregator:
+    stat_names = ('final', 'best', 'best_epoch')
+
+    def __init__(self):
+        self.num_runs = 0
+        self.stats = {}
+
+    def add_run(self, summary):
+        self.num_runs += 1
+        for metric, values in summary.items():
+            for stat in self.stat_names:
+                self.stats.setdefault((metric, stat), RunningStats()).add(values[stat])
+
+    def rows(self):
+        return [{'metric': metric, 'stat': stat, 'n': stats.n, 'mean': stats.mean, 'std': stats.std,
+                 'min': stats.min, 'max': stats.max}
+                for (metric, stat), stats in sorted(self.stats.items())]
+
+    def export(self, file_path):
+        rows = self.rows()
+        if file_path.endswith('.parquet'):
+            import pandas as pd  # 仅导出Parquet时需要pandas和pyarrow
+            pd.DataFrame(rows).to_parquet(file_path, index=False)
+        else:
+            with open(file_path, 'w', encoding='utf-8', newline='') as file:
+                writer = csv.DictWriter(file, fieldnames=['metric', 'stat', 'n', 'mean', 'std', 'min', 'max'])
+                writer.writeheader()
+                writer.writerows(rows)
+
+
+def sample_configurations(space, num_configs, seed=0):
+    # space: 参数名 -> 候选值列表；组合数过多时无放回随机抽样
+    names = list(space)
+    sizes = [len(space[name]) for name in names]
+    total = math.prod(sizes)
+    if total <= num_configs:
+        indices = range(total)
+    else:
+        indices = random.Random(seed).sample(range(total), num_configs)
+
+    configs = []
+    for index in indices:
+        config = {}
+        for name, size in zip(reversed(names), reversed(sizes)):
+            index, i = divmod(index, size)
+            config[name] = space[name][i]
+        configs.append({name: config[name] for name in names})
+    return configs
+
+
+class AsyncSuccessiveHalving:
+    def __init__(self, configs, min_budget, max_budget, eta=3, mode='max'):
+        self.configs = list(configs)
+        self.eta = eta
+        self.mode = mode
+        self.next_config = 0
+
+        self.budgets = []
+        budget = min_budget
+        while budget < max_budget:
+            self.budgets.append(int(round(budget)))
+            budget *= eta
+        self.budgets.append(max_budget)
+
+        self.results = [{} for _ in self.budgets]  # 每一级: 配置编号 -> 得分
+        self.promoted = [set() for _ in self.budgets]
+
+    def next_job(self):
+        # 异步逐级减半：优先晋级已完成结果中排名前1/eta的配置，否则启动新配置
+        for rung in reversed(range(len(self.budgets) - 1)):
+            done = self.results[rung]
+            # 晋级名额按全部已完成的运行计算，但失败的运行（得分非有限值）不参与晋级
+            finished = [config_id for config_id, score in done.items() if math.isfinite(score)]
+            top = sorted(finished, key=done.get, reverse=self.mode == 'max')[:len(done) // self.eta]
+            for config_id in top:
+                if config_id not in self.promoted[rung]:
+                    self.promoted[rung].add(config_id)
+                    return config_id, rung + 1, self.budgets[rung + 1]
+        if self.next_config < len(self.configs):
+            config_id = self.next_config
+            self.next_config += 1
+            return config_id, 0, self.budgets[0]
+        return None
+
+    def report(self, config_id, rung, score):
+        if score is None:  # 运行失败视为最差
+            score = -math.inf if self.mode == 'max' else math.inf
+        self.results[rung][config_id] = score
+
+    def best(self):
+        for rung in reversed(range(len(self.budgets))):
+            done = {config_id: score for config_id, score in self.results[rung].items() if math.isfinite(score)}
+            if done:
+                pick = max if self.mode == 'max' else min
+                config_id = pick(done, key=done.get)
+                return self.configs[config_id], self.budgets[rung], done[config_id]
+        return None
+
+
 class ArgParseGUI(QWidget):
     def __init__(self, argparse_args, file_path, zen_mode=False):
         super().__init__()
@@ -164,6 +537,15 @@ class ArgParseGUI(QWidget):
             QMessageBox.information(self, '信息', '参数更新成功!')
         self.counter += 1  # Increase counter
 
+    def zen_args(self, counter):
+        # 以命令行参数传入勾选zen的参数，并行运行时互不影响，也不改写脚本
+        args = []
+        for arg in self.argparse_args:
+            if arg['name'].startswith('--') and self.switch_buttons[arg['name']].isChecked():
+                input_text = self.input_fields[arg['name']].text()
+                args += [arg['name'], re.sub(r'\d+', str(counter), input_text)]
+        return args
+
 
     def update_file(self):
         with open(self.file_path, 'r', encoding='utf-8') as file:
@@ -195,6 +577,9 @@ class ConfigGUI(QWidget):
         self.file_path = file_path
         self.zen_mode = zen_mode  # Add zen_mode flag
         self.counter = 0  # 初始化计数器
+        self.saved = False  # 保存后才会覆盖子进程中的配置
+        self.original_attrs = dict(config_attrs)
+        self.literal_attrs = get_config_literal_attributes(file_path)  # 非字面量属性不做覆盖
         self.init_ui()
 
     def init_ui(self):
@@ -242,38 +627,36 @@ class ConfigGUI(QWidget):
 
     def save_changes(self):
         for attr in self.config_attrs:
+            input_text = self.input_fields[attr].text()
             if self.switch_buttons[attr].isChecked():
-                input_text = self.input_fields[attr].text()
-                new_text = re.sub(r'\d+', str(self.counter), input_text)
-                self.input_fields[attr].setText(new_text)
-                self.config_attrs[attr] = new_text
-        self.update_file()
+                input_text = re.sub(r'\d+', str(self.counter), input_text)
+                self.input_fields[attr].setText(input_text)
+            self.config_attrs[attr] = coerce_value(input_text, self.original_attrs[attr])
+        self.saved = True
         if not self.zen_mode:  # Only show message box if not in zen mode
             QMessageBox.information(self, '信息', '配置更新成功!')
         self.counter += 1  # Increase counter
 
-    def update_file(self):
-        with open(self.file_path, 'r', encoding='utf-8') as file:
-            lines = file.readlines()
-
-        new_lines = []
-        in_init = False
-        for line in lines:
-            new_line = line
-            if 'def __init__(self' in line:
-                in_init = True
-            elif in_init and line.strip().startswith('self.') and '=' in line:
-                for attr, value in self.config_attrs.items():
-                    if f'self.{attr}' in line:
-                        parts = line.split('=')
-                        before_equals = parts[0]
-                        new_line = f"{before_equals}= {value}\n"
-            elif in_init and line.strip().startswith('self.') and not '=' in line:
-                in_init = False
-            new_lines.append(new_line)
-
-        with open(self.file_path, 'w', encoding='utf-8') as file:
-            file.writelines(new_lines)
+    def overlay(self, counter=None, static_only=False):
+        # 生成本次运行的内存覆盖，源文件保持不变；counter 为 None 时使用已保存的值
+        if not self.saved:
+            return None
+        values = {}
+        for attr, value in self.config_attrs.items():
+            if attr not in self.literal_attrs:
+                continue
+            original = self.original_attrs[attr]
+            if self.switch_buttons[attr].isChecked():
+                if static_only:
+                    continue
+                if counter is not None:
+                    value = coerce_value(re.sub(r'\d+', str(counter), self.input_fields[attr].text()), original)
+            elif not is_changed(value, original):
+                continue  # 只覆盖用户修改过的值
+            values[attr] = repr(value)
+        if not values:
+            return None
+        return {'kind': 'config', 'path': self.file_path, 'values': values}
 
 
 class DictGUI(QWidget):
@@ -283,6 +666,8 @@ class DictGUI(QWidget):
         self.file_path = file_path
         self.zen_mode = zen_mode  # Add zen_mode flag
         self.counter = 0  # 初始化计数器
+        self.saved = False  # 保存后才会覆盖子进程中的字典参数
+        self.original_attrs = dict(dict_attrs)
         self.init_ui()
 
     def init_ui(self):
@@ -330,74 +715,575 @@ class DictGUI(QWidget):
 
     def save_changes(self):
         for attr in self.dict_attrs:
+            input_text = self.input_fields[attr].text()
             if self.switch_buttons[attr].isChecked():
-                input_text = self.input_fields[attr].text()
-                new_text = re.sub(r'\d+', str(self.counter), input_text)
-                self.input_fields[attr].setText(new_text)
-                self.dict_attrs[attr] = new_text
-        self.update_file()
+                input_text = re.sub(r'\d+', str(self.counter), input_text)
+                self.input_fields[attr].setText(input_text)
+            self.dict_attrs[attr] = coerce_value(input_text, self.original_attrs[attr])
+        self.saved = True
         if not self.zen_mode:  # Only show message box if not in zen mode
             QMessageBox.information(self, '信息', '字典参数更新成功!')
         self.counter += 1  # Increase counter
 
-    def update_file(self):
-        with open(self.file_path, 'r', encoding='utf-8') as file:
-            lines = file.readlines()
+    def overlay(self, counter=None, static_only=False):
+        # 生成本次运行的内存覆盖，源文件保持不变；counter 为 None 时使用已保存的值
+        if not self.saved:
+            return None
+        values = {}
+        for attr, value in self.dict_attrs.items():
+            original = self.original_attrs[attr]
+            if self.switch_buttons[attr].isChecked():
+                if static_only:
+                    continue
+                if counter is not None:
+                    value = coerce_value(re.sub(r'\d+', str(counter), self.input_fields[attr].text()), original)
+            elif not is_changed(value, original):
+                continue  # 只覆盖用户修改过的值
+            values[attr] = repr(value)
+        if not values:
+            return None
+        return {'kind': 'dict', 'path': self.file_path, 'values': values}
+
+
+class SearchDriver(QObject):
+    message = pyqtSignal(str)
+    done = pyqtSignal()
+
+    def __init__(self, searcher, script_path, train_data_path, test_data_path, budget_name, budget_kind,
+                 config_path=None, metric='Test_Acc', slots=1, env_vars=None):
+        super().__init__()
+        self.env_vars = env_vars or {}
+        self.searcher = searcher
+        self.script_path = script_path
+        self.train_data_path = train_data_path
+        self.test_data_path = test_data_path
+        self.budget_name = budget_name
+        self.budget_kind = budget_kind  # 'arg' 通过命令行传入，'config' 通过内存覆盖注入
+        self.config_path = config_path
+        self.metric = metric
+        self.slots = slots
+        self.running = []
+        self.gpu_budget = 0
+
+    def start(self):
+        self.launch_jobs()
+
+    def launch_jobs(self):
+        while len(self.running) < self.slots:
+            job = self.searcher.next_job()
+            if job is None:
+                break
+            config_id, rung, budget = job
+            params = dict(self.searcher.configs[config_id])
+            params[(self.budget_kind, self.budget_name)] = budget
+
+            extra_args = []
+            values = {}
+            for (kind, name), value in params.items():
+                if kind == 'arg':
+                    extra_args += [name, str(value)]
+                else:
+                    values[name] = repr(value)
+            overlays = [{'kind': 'config', 'path': self.config_path, 'values': values}] if values else []
+
+            runner = ScriptRunner(self.script_path, self.train_data_path, self.test_data_path, overlays, extra_args,
+                                  self.env_vars)
+            runner.finished.connect(lambda return_code, job=job, runner=runner:
+                                    self.on_job_finished(job, runner, return_code))
+            self.running.append(runner)
+            self.gpu_budget += budget
+            self.message.emit(f"[rung {rung}] 配置 {config_id} 开始，预算 {budget}")
+            runner.start()
+
+        if not self.running:
+            self.done.emit()
+
+    def on_job_finished(self, job, runner, return_code):
+        config_id, rung, budget = job
+        self.running.remove(runner)
+        score = None
+        if return_code == 0:
+            # 直接取原始指标序列，短预算（如1个epoch）的运行也能得到得分
+            values = runner.metrics.metrics.get(self.metric)
+            if values:
+                score = min(values) if self.searcher.mode == 'min' else max(values)
+        self.searcher.report(config_id, rung, score)
+        self.message.emit(f"[rung {rung}] 配置 {config_id} 完成，{self.metric} = {score}")
+        self.launch_jobs()
+
+
+class SearchGUI(QWidget):
+    def __init__(self, main_window):
+        super().__init__()
+        self.main_window = main_window
+        self.config_path = None
+        self.params = []  # (kind, name, default)
+        self.init_ui()
 
-        new_lines = []
-        in_dict = False
-        for line in lines:
-            new_line = line
-            if 'parameter = {' in line:
-                in_dict = True
-            elif in_dict and '}' in line:
-                in_dict = False
-            elif in_dict:
-                for attr, value in self.dict_attrs.items():
-                    if f"'{attr}':" in line:
-                        before_colon, rest = line.split(':', 1)
-                        after_colon = rest.split(',', 1)[1] if ',' in rest else ''
-                        new_value = f"'{value}'" if isinstance(value, str) else value
-                        new_line = f"{before_colon}: {new_value},{after_colon}\n"
-            new_lines.append(new_line)
+    def init_ui(self):
+        layout = QVBoxLayout()
 
-        with open(self.file_path, 'w', encoding='utf-8') as file:
-            file.writelines(new_lines)
+        file_layout = QHBoxLayout()
+        # 只从所选文件中读取 argparse 参数定义，搜索与主窗口一样运行 main.py
+        script_button = QPushButton('读取命令行参数定义', self)
+        script_button.clicked.connect(self.load_script)
+        file_layout.addWidget(script_button)
+        config_button = QPushButton('选择数值型配置文件', self)
+        config_button.clicked.connect(self.load_config)
+        file_layout.addWidget(config_button)
+        layout.addLayout(file_layout)
+
+        self.tab_widget = QTabWidget(self)
+        layout.addWidget(self.tab_widget)
+        self.input_fields = {}
+
+        settings_layout = QHBoxLayout()
+        settings_layout.addWidget(QLabel("预算参数:"))
+        self.budget_input = QComboBox(self)
+        settings_layout.addWidget(self.budget_input)
+        settings_layout.addWidget(QLabel("最小/最大预算:"))
+        self.min_budget_input = QSpinBox(self)
+        self.min_budget_input.setRange(1, 100000)
+        self.min_budget_input.setValue(3)
+        settings_layout.addWidget(self.min_budget_input)
+        self.max_budget_input = QSpinBox(self)
+        self.max_budget_input.setRange(1, 100000)
+        self.max_budget_input.setValue(27)
+        settings_layout.addWidget(self.max_budget_input)
+        settings_layout.addWidget(QLabel("eta:"))
+        self.eta_input = QSpinBox(self)
+        self.eta_input.setRange(2, 10)
+        self.eta_input.setValue(3)
+        settings_layout.addWidget(self.eta_input)
+        settings_layout.addWidget(QLabel("配置数:"))
+        self.num_configs_input = QSpinBox(self)
+        self.num_configs_input.setRange(1, 10000)
+        self.num_configs_input.setValue(27)
+        settings_layout.addWidget(self.num_configs_input)
+        settings_layout.addWidget(QLabel("指标:"))
+        self.metric_input = QLineEdit('Test_Acc', self)
+        settings_layout.addWidget(self.metric_input)
+        layout.addLayout(settings_layout)
+
+        start_button = QPushButton('开始搜索', self)
+        start_button.clicked.connect(self.start_search)
+        layout.addWidget(start_button)
+
+        self.output_text = QTextEdit(self)
+        self.output_text.setReadOnly(True)
+        layout.addWidget(self.output_text, 1)
+
+        self.setLayout(layout)
+        self.setWindowTitle('Search GUI')
+        self.resize(900, 600)
+
+    def select_file(self):
+        file_dialog = QFileDialog()
+        file_dialog.setNameFilter("Python 文件 (*.py)")
+        if file_dialog.exec():
+            filenames = file_dialog.selectedFiles()
+            if filenames:
+                return filenames[0]
+        return None
+
+    def load_script(self):
+        script_path = self.select_file()
+        if script_path:
+            self.params = [p for p in self.params if p[0] != 'arg']
+            self.params += [('arg', arg['name'], arg['default']) for arg in get_argparse_args(script_path)
+                            if arg['name'].startswith('--')]
+            self.build_param_tabs()
+
+    def load_config(self):
+        config_path = self.select_file()
+        if config_path:
+            self.config_path = config_path
+            self.params = [p for p in self.params if p[0] != 'config']
+            self.params += [('config', attr, value) for attr, value in get_config_attributes(config_path).items()]
+            self.build_param_tabs()
+
+    def build_param_tabs(self):
+        self.tab_widget.clear()
+        self.budget_input.clear()
+        self.input_fields = {}
+        params_per_tab = 10  # 每个选项卡包含的参数数量
+
+        for i in range(0, len(self.params), params_per_tab):
+            tab = QWidget()
+            tab_layout = QVBoxLayout(tab)
+            for kind, name, default in self.params[i:i + params_per_tab]:
+                row_layout = QHBoxLayout()
+                label = QLabel(f"{name} (默认 {default}):")
+                label.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Preferred)
+                row_layout.addWidget(label)
+
+                input_field = QLineEdit(self)
+                input_field.setPlaceholderText("候选值，逗号分隔；留空则不搜索")
+                row_layout.addWidget(input_field)
+
+                self.input_fields[(kind, name)] = input_field
+                self.budget_input.addItem(name, (kind, name))
+                tab_layout.addLayout(row_layout)
+
+            self.tab_widget.addTab(tab, f"参数组 {i // params_per_tab + 1}")
+
+    def start_search(self):
+        main_window = self.main_window
+        if not (main_window.train_data_path and main_window.test_data_path):
+            QMessageBox.warning(self, "未加载数据", "请先在主界面加载训练和测试数据。")
+            return
+        budget_key = self.budget_input.currentData()
+        if budget_key is None:
+            QMessageBox.warning(self, "缺少预算参数", "请先选择参数文件并指定预算参数（如epoch数）。")
+            return
+
+        defaults = {(kind, name): default for kind, name, default in self.params}
+        space = {}
+        for key, field in self.input_fields.items():
+            if key != budget_key and field.text().strip():
+                space[key] = [coerce_value(value.strip(), defaults[key])
+                              for value in field.text().split(',') if value.strip()]
+        configs = sample_configurations(space, self.num_configs_input.value())
+
+        metric = self.metric_input.text().strip()
+        searcher = AsyncSuccessiveHalving(configs, self.min_budget_input.value(), self.max_budget_input.value(),
+                                          self.eta_input.value(), metric_mode(metric))
+        self.output_text.append(f"共 {len(configs)} 个配置，各级预算: {searcher.budgets}")
+
+        self.driver = SearchDriver(searcher, "main.py", main_window.train_data_path, main_window.test_data_path,
+                                   budget_key[1], budget_key[0], self.config_path, metric,
+                                   main_window.slots_input.value(), main_window.data_server_env())
+        self.driver.message.connect(self.output_text.append)
+        self.driver.done.connect(self.on_search_finished)
+        self.driver.start()
+
+    def on_search_finished(self):
+        best = self.driver.searcher.best()
+        full_grid = len(self.driver.searcher.configs) * self.driver.searcher.budgets[-1]
+        self.output_text.append(f"搜索完成，总预算 {self.driver.gpu_budget}（完整网格需 {full_grid}）")
+        if best:
+            config, budget, score = best
+            params = ", ".join(f"{name}={value}" for (_, name), value in config.items())
+            self.output_text.append(f"最优配置: {params or '默认参数'}，预算 {budget}，{self.driver.metric} = {score}")
+
+
+class AggregateGUI(QWidget):
+    def __init__(self, aggregator):
+        super().__init__()
+        self.aggregator = aggregator
+        self.init_ui()
+
+    def init_ui(self):
+        layout = QVBoxLayout()
+
+        self.summary_label = QLabel("已完成 0 次运行", self)
+        layout.addWidget(self.summary_label)
+
+        self.table = QTableWidget(self)
+        self.table.setColumnCount(6)
+        self.table.setHorizontalHeaderLabels(["指标", "统计量", "n", "mean ± std", "min", "max"])
+        layout.addWidget(self.table)
+
+        export_button = QPushButton('导出', self)
+        export_button.clicked.connect(self.export_results)
+        layout.addWidget(export_button)
+
+        self.setLayout(layout)
+        self.setWindowTitle('跨被试结果汇总')
+        self.resize(700, 400)
+
+    def update_table(self):
+        rows = self.aggregator.rows()
+        self.summary_label.setText(f"已完成 {self.aggregator.num_runs} 次运行")
+        self.table.setRowCount(len(rows))
+        for i, row in enumerate(rows):
+            cells = [row['metric'], row['stat'], str(row['n']), f"{row['mean']:.4f} ± {row['std']:.4f}",
+                     f"{row['min']:.4f}", f"{row['max']:.4f}"]
+            for j, cell in enumerate(cells):
+                self.table.setItem(i, j, QTableWidgetItem(cell))
+
+    def export_results(self):
+        file_path, _ = QFileDialog.getSaveFileName(self, "导出结果", "results.csv",
+                                                   "CSV 文件 (*.csv);;Parquet 文件 (*.parquet)")
+        if file_path:
+            try:
+                self.aggregator.export(file_path)
+            except ImportError:
+                QMessageBox.warning(self, "缺少依赖", "导出Parquet需要安装pandas和pyarrow。")
+                return
+            QMessageBox.information(self, '信息', f'结果已导出到 {file_path}')
+
+
+class LogFollower(QObject):
+    lines = pyqtSignal(str, list)
+
+    def __init__(self, parent=None, poll_interval=2000, chunk_size=1 << 20):
+        super().__init__(parent)
+        self.files = {}  # 路径 -> 打开的文件句柄与未完成的行
+        self.chunk_size = chunk_size  # 每次最多读取的字节数，附加到很大的日志时不阻塞界面
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.fileChanged.connect(self.read_new)
+        self.watcher.directoryChanged.connect(self.on_directory_changed)
+        # 网络文件系统（如集群NFS）不一定有变更通知，低频轮询兜底
+        self.poll_timer = QTimer(self)
+        self.poll_timer.timeout.connect(self.poll)
+        self.poll_timer.start(poll_interval)
+
+    def add(self, path):
+        path = os.path.abspath(path)
+        if path in self.files:
+            return
+        self.files[path] = {'file': None, 'partial': b'', 'eof': True, 'scheduled': False}
+        self.watcher.addPath(os.path.dirname(path))
+        self.read_new(path)
+
+    def remove(self, path):
+        state = self.files.pop(path, None)
+        if state and state['file']:
+            state['file'].close()
+        if path in self.watcher.files():
+            self.watcher.removePath(path)
+        directory = os.path.dirname(path)
+        if not any(os.path.dirname(other) == directory for other in self.files):
+            self.watcher.removePath(directory)
+
+    def poll(self):
+        for path in list(self.files):
+            self.read_new(path)
+
+    def on_directory_changed(self, directory):
+        for path in list(self.files):
+            if os.path.dirname(path) == directory:
+                self.read_new(path)
+
+    def read_new(self, path):
+        state = self.files.get(path)
+        if state is None:
+            return
+        if state['file'] is None:
+            try:
+                state['file'] = open(path, 'rb')
+            except OSError:
+                return  # 文件尚未创建或已被移走，等待目录变化
+            if path not in self.watcher.files():
+                self.watcher.addPath(path)
+
+        # 从上次的字节偏移处继续读取
+        new_lines = self.read_lines(state)
+        if not state['eof']:
+            # 还有未读内容：先发出这一块，回到事件循环后再继续读取
+            self.schedule_read(path, state)
+            if new_lines:
+                self.lines.emit(path, new_lines)
+            return
+
+        try:
+            current = os.stat(path)
+        except OSError:
+            current = None
+        opened = os.fstat(state['file'].fileno())
+        if current is None or current.st_ino != opened.st_ino:
+            # 日志被轮转：旧文件已读完，切换到新文件
+            state['file'].close()
+            state['file'] = None
+            state['partial'] = b''
+            if current is not None:
+                try:
+                    state['file'] = open(path, 'rb')
+                except OSError:
+                    pass
+                else:
+                    self.watcher.addPath(path)
+                    new_lines += self.read_lines(state)
+        elif current.st_size < state['file'].tell():
+            # 日志被截断，从头读取
+            state['file'].seek(0)
+            state['partial'] = b''
+            new_lines += self.read_lines(state)
+        if state['file'] is not None and not state['eof']:
+            self.schedule_read(path, state)
+
+        if new_lines:
+            self.lines.emit(path, new_lines)
+
+    def schedule_read(self, path, state):
+        if not state['scheduled']:
+            state['scheduled'] = True
+            QTimer.singleShot(0, lambda: self.continue_read(path, state))
+
+    def continue_read(self, path, state):
+        state['scheduled'] = False
+        if self.files.get(path) is state:
+            self.read_new(path)
+
+    def read_lines(self, state):
+        data = state['file'].read(self.chunk_size)
+        state['eof'] = len(data) < self.chunk_size
+        if not data:
+            return []
+        chunks = (state['partial'] + data).split(b'\n')
+        state['partial'] = chunks.pop()
+        return [chunk.decode('utf-8', errors='replace') for chunk in chunks]
+
+
+class AttachGUI(QWidget):
+    def __init__(self):
+        super().__init__()
+        self.streams = {}
+        self.dirty = False
+        self.follower = LogFollower(self)
+        self.follower.lines.connect(self.on_lines)
+        self.init_ui()
+
+        # 定时重绘，避免每行输出都刷新图像
+        self.redraw_timer = QTimer(self)
+        self.redraw_timer.timeout.connect(self.redraw)
+        self.redraw_timer.start(1000)
+
+    def init_ui(self):
+        layout = QVBoxLayout()
+
+        button_layout = QHBoxLayout()
+        add_button = QPushButton('添加日志文件', self)
+        add_button.clicked.connect(self.add_logs)
+        button_layout.addWidget(add_button)
+        remove_button = QPushButton('移除选中', self)
+        remove_button.clicked.connect(self.remove_selected)
+        button_layout.addWidget(remove_button)
+        layout.addLayout(button_layout)
+
+        self.file_list = QListWidget(self)
+        self.file_list.setMaximumHeight(100)
+        layout.addWidget(self.file_list)
+
+        self.figure = Figure(figsize=(10, 6))
+        self.canvas = FigureCanvasQTAgg(self.figure)
+        layout.addWidget(self.canvas, 1)
+
+        self.setLayout(layout)
+        self.setWindowTitle('Attach GUI')
+        self.resize(1000, 700)
+
+    def add_logs(self):
+        filenames, _ = QFileDialog.getOpenFileNames(self, "选择日志文件", "", "日志文件 (*.log *.txt *.out);;所有文件 (*)")
+        for path in filenames:
+            self.attach(path)
+
+    def attach(self, path):
+        path = os.path.abspath(path)
+        if path in self.streams:
+            return
+        self.streams[path] = MetricStream()
+        self.file_list.addItem(path)
+        self.follower.add(path)
+
+    def remove_selected(self):
+        for item in self.file_list.selectedItems():
+            path = item.text()
+            self.follower.remove(path)
+            self.streams.pop(path, None)
+            self.file_list.takeItem(self.file_list.row(item))
+        self.dirty = True
+
+    def on_lines(self, path, lines):
+        stream = self.streams.get(path)
+        if stream is None:
+            return
+        for line in lines:
+            stream.feed(line)
+        self.dirty = True
+
+    def redraw(self):
+        if not self.dirty:
+            return
+        self.dirty = False
+        self.figure.clear()
+
+        keys = sorted({key for stream in self.streams.values() for key in stream.plot_metrics()})
+        num_cols = 2 if len(keys) > 1 else 1
+        num_rows = (len(keys) + 1) // num_cols if keys else 0
+        for idx, key in enumerate(keys):
+            ax = self.figure.add_subplot(num_rows, num_cols, idx + 1)
+            for path, stream in self.streams.items():
+                values = stream.metrics.get(key, [])
+                if len(values) > 1:
+                    # 每个指标使用自己出现时的 epoch，不同指标记录频率不同时也能对齐
+                    ax.plot(stream.metric_epochs[key], values, label=os.path.basename(path))
+            ax.set_xlabel('Epoch')
+            ax.set_ylabel(key)
+            ax.set_title(key)
+            ax.legend(fontsize='small')
+
+        if keys:
+            self.figure.tight_layout()
+        self.canvas.draw_idle()
+
+    def closeEvent(self, event):
+        # 关闭窗口即停止跟踪，重新打开时从空列表开始
+        for path in list(self.streams):
+            self.follower.remove(path)
+        self.streams.clear()
+        self.file_list.clear()
+        self.figure.clear()
+        self.canvas.draw_idle()
+        super().closeEvent(event)
 
 
 class ScriptRunner(QThread):
     output = pyqtSignal(str)
+    epoch = pyqtSignal(int, int)
     finished = pyqtSignal(int)
 
-    def __init__(self, script_path, train_data_path, test_data_path):
+    def __init__(self, script_path, train_data_path, test_data_path, overlays=None, extra_args=None, env_vars=None):
         super().__init__()
         self.script_path = script_path
         self.train_data_path = train_data_path
         self.test_data_path = test_data_path
+        self.overlays = overlays or []
+        self.extra_args = extra_args or []
+        self.env_vars = env_vars or {}
+        self.metrics = MetricStream()
 
     def run(self):
+        command = [self.script_path, "--source_path", self.train_data_path, "--target_path", self.test_data_path,
+                   "--subset", "True"] + self.extra_args
+        env = dict(os.environ)
+        env.update(self.env_vars)
+        if self.overlays:
+            # 通过引导脚本在导入时注入Config属性和字典参数
+            tool_dir = os.path.dirname(os.path.abspath(__file__))
+            command.insert(0, os.path.join(tool_dir, "alchemy_overlay.py"))
+            env[OVERLAY_ENV] = json.dumps(self.overlays, ensure_ascii=False)
+            # sitecustomize 让该运行派生的每个解释器（如spawn启动的DataLoader worker）也安装覆盖
+            paths = [os.path.join(tool_dir, "alchemy_site"), tool_dir]
+            if env.get('PYTHONPATH'):
+                paths.append(env['PYTHONPATH'])
+            env['PYTHONPATH'] = os.pathsep.join(paths)
+
         process = subprocess.Popen(
-            ["python", self.script_path, "--source_path", self.train_data_path, "--target_path", self.test_data_path,
-             "--subset", "True"],
+            ["python"] + command,
             stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
+            stderr=subprocess.STDOUT,  # 合并stderr，使logging等输出也能实时解析
             text=True,
             bufsize=1,
-            encoding='utf-8'
+            encoding='utf-8',
+            env=env
         )
 
         for line in process.stdout:
-            self.output.emit(line)
-        for line in process.stderr:
+            epoch = self.metrics.feed(line)
+            if epoch is not None:
+                self.epoch.emit(epoch, self.metrics.total_epochs or 0)
             self.output.emit(line)
 
         process.stdout.close()
-        process.stderr.close()
         return_code = process.wait()
         self.finished.emit(return_code)
 
 
 class MainWindow(QMainWindow):
+    render_error = pyqtSignal(str)
+
     def __init__(self):
         super().__init__()
 
@@ -436,22 +1322,57 @@ class MainWindow(QMainWindow):
         self.button_modify_args.setStyleSheet(
             "background-color: #9C27B0; color: white; border-radius: 5px; padding: 5px;")
 
+        self.button_attach_logs = QPushButton("附加日志", self)
+        self.button_attach_logs.setToolTip("跟踪外部运行的日志文件并实时绘图")
+        self.button_attach_logs.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.button_attach_logs.setStyleSheet(
+            "background-color: #607D8B; color: white; border-radius: 5px; padding: 5px;")
+
+        self.button_search = QPushButton("参数搜索", self)
+        self.button_search.setToolTip("逐级减半搜索超参数")
+        self.button_search.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.button_search.setStyleSheet(
+            "background-color: #E91E63; color: white; border-radius: 5px; padding: 5px;")
+
         self.zen_mode_checkbox = QCheckBox("禅模式", self)
         self.zen_mode_checkbox.setToolTip("启用禅模式（禁用绘图功能）")
 
+        self.shared_data_checkbox = QCheckBox("共享数据集", self)
+        self.shared_data_checkbox.setToolTip("同一数据集只加载一次到共享内存，供并行运行共用")
+
         # 添加全局num设置
         self.num_label = QLabel("Specify num:")
         self.num_input = QSpinBox()
         self.num_input.setMinimum(1)
         self.num_input.setValue(1)  # 默认值设为1
 
+        # 禅模式并行槽位数
+        self.slots_label = QLabel("并行数:")
+        self.slots_input = QSpinBox()
+        self.slots_input.setMinimum(1)
+        self.slots_input.setValue(1)
+
+        # 每次运行的总epoch数，0表示从输出中自动检测
+        self.epochs_label = QLabel("总epoch:")
+        self.epochs_input = QSpinBox()
+        self.epochs_input.setRange(0, 100000)
+        self.epochs_input.setValue(0)
+        self.epochs_input.setSpecialValueText("自动")
+
         button_layout.addWidget(self.button_load_train_data)
         button_layout.addWidget(self.button_load_test_data)
         button_layout.addWidget(self.button_run_script)
         button_layout.addWidget(self.button_modify_args)
+        button_layout.addWidget(self.button_attach_logs)
+        button_layout.addWidget(self.button_search)
         button_layout.addWidget(self.zen_mode_checkbox)
+        button_layout.addWidget(self.shared_data_checkbox)
         button_layout.addWidget(self.num_label)
         button_layout.addWidget(self.num_input)
+        button_layout.addWidget(self.slots_label)
+        button_layout.addWidget(self.slots_input)
+        button_layout.addWidget(self.epochs_label)
+        button_layout.addWidget(self.epochs_input)
 
         top_layout.addLayout(button_layout)
 
@@ -474,6 +1395,9 @@ class MainWindow(QMainWindow):
             "QProgressBar::chunk {background-color: #4CAF50;}")
         bottom_layout.addWidget(self.progress_bar)
 
+        self.progress_label = QLabel("", self)
+        bottom_layout.addWidget(self.progress_label)
+
         self.output_text = QTextEdit(self)
         self.output_text.setReadOnly(True)
         bottom_layout.addWidget(self.output_text, 1)
@@ -482,12 +1406,19 @@ class MainWindow(QMainWindow):
 
         self.train_data_path = None
         self.test_data_path = None
-        self.outputs = []
+        self.run_history = RunHistory()
+        self.zen_queue = []
+        self.zen_running = []
+        self.render_pool = None
+        self.render_error.connect(self.append_output)
+        self.data_server = None
 
         self.button_load_train_data.clicked.connect(self.load_train_data)
         self.button_load_test_data.clicked.connect(self.load_test_data)
         self.button_run_script.clicked.connect(self.run_script)
         self.button_modify_args.clicked.connect(self.modify_args)
+        self.button_attach_logs.clicked.connect(self.attach_logs)
+        self.button_search.clicked.connect(self.open_search)
 
     def load_train_data(self):
         if self.zen_mode_checkbox.isChecked():
@@ -555,103 +1486,265 @@ class MainWindow(QMainWindow):
 
     def run_script(self):
         if self.train_data_path and self.test_data_path:
-            script_path = "main.py"  # 修改为你要运行的脚本路径
-
-            # 每次运行脚本前更新参数并增加计数器的值
             if self.zen_mode_checkbox.isChecked():
-                self.modify_zen_args_counter()
+                self.start_zen_batch()
+                return
 
-            self.script_runner = ScriptRunner(script_path, self.train_data_path, self.test_data_path)
+            script_path = "main.py"  # 修改为你要运行的脚本路径
+            self.progress = ProgressTracker(1, self.epochs_input.value())
+            self.progress.start_run(1)
+            self.update_progress()
+
+            self.script_runner = ScriptRunner(script_path, self.train_data_path, self.test_data_path,
+                                              self.current_overlays(), env_vars=self.data_server_env())
             self.script_runner.output.connect(self.append_output)
+            self.script_runner.epoch.connect(lambda epoch, total: self.on_epoch(1, epoch, total))
             self.script_runner.finished.connect(self.on_script_finished)
             self.script_runner.start()
         else:
             QMessageBox.warning(self, "未加载数据",
                                 "请先加载训练和测试数据，然后再运行脚本。")
 
+    def data_server_env(self):
+        # 启用共享数据集时按需启动数据集服务，并返回子进程需要的环境变量
+        if not self.shared_data_checkbox.isChecked():
+            return {}
+        if self.data_server is None or self.data_server.poll() is not None:
+            authkey = secrets.token_hex(16)
+            tool_dir = os.path.dirname(os.path.abspath(__file__))
+            self.data_server = subprocess.Popen(
+                ["python", os.path.join(tool_dir, "alchemy_data.py")],
+                stdout=subprocess.PIPE,
+                text=True,
+                env=dict(os.environ, **{AUTHKEY_ENV: authkey})
+            )
+            address = self.data_server.stdout.readline().strip()
+            if not address:
+                self.data_server = None
+                QMessageBox.warning(self, "数据集服务", "数据集服务启动失败，将在各运行中单独加载数据。")
+                self.shared_data_checkbox.setChecked(False)
+                return {}
+            pythonpath = os.environ.get('PYTHONPATH')
+            self.data_server_vars = {
+                SERVER_ENV: address,
+                AUTHKEY_ENV: authkey,
+                # 让训练脚本可以导入 alchemy_data.load_dataset
+                'PYTHONPATH': tool_dir + os.pathsep + pythonpath if pythonpath else tool_dir,
+            }
+        return self.data_server_vars
+
+    def closeEvent(self, event):
+        if self.data_server is not None and self.data_server.poll() is None:
+            self.data_server.terminate()
+        if self.render_pool is not None:
+            self.render_pool.shutdown(wait=False)
+        super().closeEvent(event)
+
     def append_output(self, text):
-        self.outputs.append(text)
         self.output_text.append(text)
 
+    def on_epoch(self, run_id, epoch, total):
+        self.progress.update(run_id, epoch, total)
+        self.update_progress()
+
+    def update_progress(self):
+        progress = self.progress
+        batch_eta = progress.batch_eta()
+        self.progress_bar.setValue(int(progress.batch_fraction() * 100))
+        self.progress_bar.setFormat(
+            f"%p%  {progress.completed_runs}/{progress.total_runs}  {progress.batch_rate():.1f} epoch/min  "
+            f"ETA {format_duration(batch_eta) if batch_eta is not None else '--'}")
+
+        lines = []
+        for run_id, state in sorted(progress.runs.items()):
+            run_eta = progress.run_eta(state)
+            lines.append(f"[{run_id}] epoch {state['done']}/{state['total'] or '?'}  "
+                         f"{state['rate'] or 0:.1f} epoch/min  "
+                         f"ETA {format_duration(run_eta) if run_eta is not None else '--'}")
+        self.progress_label.setText("\n".join(lines))
+
     def on_script_finished(self, return_code):
+        self.progress.finish_run(1)
+        self.update_progress()
         if return_code != 0:
             QMessageBox.warning(self, "脚本错误", "脚本运行时出现错误，请检查输出信息。")
         else:
-            if not self.zen_mode_checkbox.isChecked():
-                self.extract_and_plot_metrics()
-            else:
-                self.run_next_iteration()
+            self.extract_and_plot_metrics()
+
+    def current_overlays(self, counter=None, static_only=False):
+        overlays = []
+        for gui in (getattr(self, 'config_gui', None), getattr(self, 'dict_gui', None)):
+            overlay = gui.overlay(counter, static_only) if gui else None
+            if overlay:
+                overlays.append(overlay)
+        return overlays
+
+    def current_run_params(self):
+        # 未勾选zen的参数决定运行配置，用于区分历史耗时
+        params = {}
+        if hasattr(self, 'argparse_gui'):
+            for name, field in self.argparse_gui.input_fields.items():
+                if not self.argparse_gui.switch_buttons[name].isChecked():
+                    params[name] = field.text()
+        for overlay in self.current_overlays(static_only=True):
+            params[f"{overlay['kind']}:{overlay['path']}"] = overlay['values']
+        return params
+
+    def start_zen_batch(self):
+        if self.zen_running:
+            QMessageBox.warning(self, "正在运行", "当前批处理尚未结束。")
+            return
+
+        script_path = "main.py"  # 修改为你要运行的脚本路径
+        train_paths = [self.train_data_path]
+        test_paths = [self.test_data_path]
+        for app, paths in ((getattr(self, 'zen_mode_train_app', None), train_paths),
+                           (getattr(self, 'zen_mode_test_app', None), test_paths)):
+            if app:
+                paths.extend(app.next_paths)
+                app.next_paths = []
+
+        params = self.current_run_params()
+        jobs = []
+        for index, (train_path, test_path) in enumerate(zip(train_paths, test_paths), start=1):
+            key = RunHistory.make_key(script_path, train_path, test_path, params)
+            data_size = get_data_size(train_path) + get_data_size(test_path)
+            jobs.append({
+                'index': index,
+                'script_path': script_path,
+                'train_data_path': train_path,
+                'test_data_path': test_path,
+                'key': key,
+                'data_size': data_size,
+                'estimate': self.run_history.estimate(key, data_size),
+            })
+
+        slots = self.slots_input.value()
+        self.zen_queue, self.zen_predicted_makespan = schedule_longest_first(jobs, slots)
+        self.zen_failed = []
+        self.zen_batch_start = time.monotonic()
+
+        self.progress = ProgressTracker(len(jobs), self.epochs_input.value())
+        self.update_progress()
+
+        self.aggregator = ResultAggregator()
+        self.aggregate_gui = AggregateGUI(self.aggregator)
+        self.aggregate_gui.show()
+
+        # 图像在独立进程中渲染，不阻塞下一次运行的启动；
+        # spawn 进程会将本文件作为 __mp_main__ 重新导入（含PyQt6与pyplot），但不会创建窗口
+        self.report_dir = os.path.abspath(os.path.join("reports", time.strftime("%Y%m%d_%H%M%S")))
+        self.report_runs = []
+        if self.render_pool is None:
+            self.render_pool = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+
+        self.append_output("运行顺序:")
+        for job in self.zen_queue:
+            estimate = format_duration(job['estimate']) if job['estimate'] is not None else "未知"
+            self.append_output(f"[{job['index']}] {job['train_data_path']} (预计 {estimate})")
+
+        self.launch_zen_jobs()
+
+    def launch_zen_jobs(self):
+        while self.zen_queue and len(self.zen_running) < self.slots_input.value():
+            job = self.zen_queue.pop(0)
+            self.set_train_data_path(job['train_data_path'])
+            self.set_test_data_path(job['test_data_path'])
+
+            # 计数器与被试序号保持一致，不受运行顺序影响
+            runner = ScriptRunner(job['script_path'], job['train_data_path'], job['test_data_path'],
+                                  self.current_overlays(job['index'] - 1), self.zen_args(job['index'] - 1),
+                                  self.data_server_env())
+            runner.output.connect(self.append_output)
+            runner.epoch.connect(lambda epoch, total, job=job: self.on_epoch(job['index'], epoch, total))
+            runner.finished.connect(lambda return_code, job=job: self.on_zen_job_finished(job, return_code))
+            job['runner'] = runner
+            job['start'] = time.monotonic()
+            self.progress.start_run(job['index'], job['start'])
+            self.zen_running.append(job)
+            runner.start()
+
+        if not self.zen_queue and not self.zen_running:
+            self.finish_zen_batch()
+
+    def on_zen_job_finished(self, job, return_code):
+        duration = time.monotonic() - job['start']
+        self.zen_running.remove(job)
+        self.progress.finish_run(job['index'])
+        self.update_progress()
+        self.report_runs.append({'index': job['index'], 'train_data_path': job['train_data_path'],
+                                 'test_data_path': job['test_data_path'], 'duration': duration,
+                                 'return_code': return_code})
+        if return_code == 0:
+            stream = job['runner'].metrics
+            self.run_history.record(job['key'], duration, job['data_size'])
+            self.aggregator.add_run(stream.summary())
+            self.aggregate_gui.update_table()
+            self.submit_render(f"运行 {job['index']} 的图像", render_run, self.report_dir, f"run_{job['index']}",
+                               stream.epochs, stream.plot_metrics())
+        else:
+            self.zen_failed.append(job)
+            self.append_output(f"[{job['index']}] 运行出错，返回码 {return_code}")
+        self.launch_zen_jobs()
+
+    def submit_render(self, name, fn, *args):
+        try:
+            future = self.render_pool.submit(fn, *args)
+        except Exception as e:  # 渲染进程异常退出后进程池不可再用
+            self.append_output(f"{name}渲染失败: {e!r}")
+            self.render_pool = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn"))
+            return
+        future.add_done_callback(lambda future: self.on_render_done(name, future))
+
+    def on_render_done(self, name, future):
+        # 回调在进程池的管理线程中执行，通过信号回到界面线程输出
+        error = future.exception()
+        if error is not None:
+            self.render_error.emit(f"{name}渲染失败: {error!r}")
+
+    def finish_zen_batch(self):
+        actual = time.monotonic() - self.zen_batch_start
+        if self.zen_predicted_makespan is None:
+            predicted = "未知（缺少历史记录）"
+        else:
+            predicted = format_duration(self.zen_predicted_makespan)
+        report = f"预计总耗时: {predicted}，实际总耗时: {format_duration(actual)}"
+        if self.zen_failed:
+            report += f"\n失败的运行: {', '.join(str(job['index']) for job in self.zen_failed)}"
+        report += f"\n报告目录: {self.report_dir}"
+        self.append_output(report)
+        self.submit_render("批处理报告", write_batch_report, self.report_dir,
+                           sorted(self.report_runs, key=lambda run: run['index']), self.aggregator.rows())
+        QMessageBox.information(self, "运行完成", f"所有路径都已处理完毕。\n{report}")
 
     def extract_and_plot_metrics(self):
-        full_output = "\n".join(self.outputs)
-
-        epoch_pattern = re.compile(r'Epoch\s*[:=]\s*(\d+)')
-        metric_pattern = re.compile(r'([a-zA-Z_ ]+)\s*[:=]\s*([\d.]+)')
-
-        metrics = {}
-        epochs = []
-
-        for line in full_output.split("\n"):
-            epoch_match = epoch_pattern.search(line)
-            if epoch_match:
-                epoch = int(epoch_match.group(1))
-                epochs.append(epoch)
-                continue
-
-            for match in metric_pattern.finditer(line):
-                key, value = match.groups()
-                key = key.strip().replace(" ", "_")
-                if key not in metrics:
-                    metrics[key] = []
-                metrics[key].append(float(value))
-
-        metrics = {k: v for k, v in metrics.items() if len(v) > 1}
+        # 使用运行过程中流式解析得到的指标
+        stream = self.script_runner.metrics
+        epochs = stream.epochs
+        metrics = stream.plot_metrics()
 
         self.plot_combined_metrics(epochs, metrics)
         self.plot_separate_metrics(epochs, metrics)
 
     def plot_combined_metrics(self, epochs, metrics):
-        plt.figure(figsize=(10, 6))
-        for key, values in metrics.items():
-            if len(values) == len(epochs):
-                plt.plot(epochs, values, label=key)
-
-        plt.xlabel('Epoch')
-        plt.ylabel('Metrics')
-        plt.title('训练和测试指标')
-
-        step = max(1, len(epochs) // 10)
-        plt.xticks(epochs[::step])
-
-        plt.legend()
-        plt.tight_layout()
+        fig = plt.figure(figsize=(10, 6))
+        draw_combined_metrics(fig, epochs, metrics)
         plt.show()
 
     def plot_separate_metrics(self, epochs, metrics):
-        num_metrics = len(metrics)
-        num_cols = 2
-        num_rows = (num_metrics + 1) // num_cols
-
-        fig, axes = plt.subplots(num_rows, num_cols, figsize=(8, 4 * num_rows))
-        axes = axes.flatten()
-
-        for idx, (key, values) in enumerate(metrics.items()):
-            if len(values) == len(epochs):
-                axes[idx].plot(epochs, values, label=key)
-                axes[idx].set_xlabel('Epoch')
-                axes[idx].set_ylabel(key)
-                axes[idx].set_title(key)
-
-                step = max(1, len(epochs) // 10)
-                axes[idx].set_xticks(epochs[::step])
-
-                axes[idx].legend()
+        fig = plt.figure(figsize=separate_figsize(metrics))
+        draw_separate_metrics(fig, epochs, metrics)
+        plt.show()
 
-        for i in range(num_metrics, len(axes)):
-            fig.delaxes(axes[i])
+    def attach_logs(self):
+        if not hasattr(self, 'attach_gui'):
+            self.attach_gui = AttachGUI()
+        self.attach_gui.show()
+        self.attach_gui.add_logs()
 
-        plt.tight_layout()
-        plt.show()
+    def open_search(self):
+        self.search_gui = SearchGUI(self)
+        self.search_gui.show()
 
     def modify_args(self):
         if self.zen_mode_checkbox.isChecked():
@@ -702,25 +1795,10 @@ class MainWindow(QMainWindow):
                 self.argparse_gui = ArgParseGUI(argparse_args, script_path, True)
                 self.argparse_gui.show()
 
-    def modify_zen_args_counter(self):
+    def zen_args(self, counter):
         if hasattr(self, 'argparse_gui') and self.argparse_gui.isVisible():
-            self.argparse_gui.save_changes()
-
-    def run_next_iteration(self):
-        next_train_path = next_test_path = None
-
-        if self.zen_mode_train_app and self.zen_mode_train_app.next_paths:
-            next_train_path = self.zen_mode_train_app.next_paths.pop(0)
-            self.set_train_data_path(next_train_path)
-
-        if self.zen_mode_test_app and self.zen_mode_test_app.next_paths:
-            next_test_path = self.zen_mode_test_app.next_paths.pop(0)
-            self.set_test_data_path(next_test_path)
-
-        if next_train_path and next_test_path:
-            self.run_script()
-        else:
-            QMessageBox.information(self, "运行完成", "所有路径都已处理完毕。")
+            return self.argparse_gui.zen_args(counter)
+        return []
 
 
 class ZenModeApp(QWidget):
@@ -0,0 +1,316 @@
+import os
+import sys
+import time
+import signal
+import atexit
+import argparse
+import threading
+from multiprocessing import shared_memory
+from multiprocessing.connection import Listener, Client
+import numpy as np
+
+# 子进程通过这两个环境变量找到数据集服务
+SERVER_ENV = 'ALCHEMY_DATA_SERVER'  # host:port
+AUTHKEY_ENV = 'ALCHEMY_DATA_AUTHKEY'  # 十六进制字符串
+
+DATA_EXTENSIONS = ('.pt', '.mat', '.csv', '.hdf5', '.h5')
+
+
+def flatten_arrays(obj, prefix, arrays):
+    # 将张量、字典、列表等嵌套结构展开为 名称 -> ndarray
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            flatten_arrays(value, f"{prefix}/{key}" if prefix else str(key), arrays)
+    elif isinstance(obj, (list, tuple)):
+        for i, value in enumerate(obj):
+            flatten_arrays(value, f"{prefix}/{i}" if prefix else str(i), arrays)
+    elif hasattr(obj, 'detach') and hasattr(obj, 'numpy'):
+        arrays[prefix] = obj.detach().cpu().numpy()
+    elif isinstance(obj, np.ndarray):
+        arrays[prefix] = obj
+    return arrays
+
+
+def load_file(path, prefix=''):
+    ext = os.path.splitext(path)[1].lower()
+    if ext == '.pt':
+        import torch
+        return flatten_arrays(torch.load(path, map_location='cpu'), prefix, {})
+    if ext == '.mat':
+        import scipy.io
+        try:
+            data = scipy.io.loadmat(path)
+        except NotImplementedError:
+            return load_file_hdf5(path, prefix)  # v7.3 的 mat 文件为 HDF5 格式
+        return flatten_arrays({k: v for k, v in data.items() if not k.startswith('__')}, prefix, {})
+    if ext in ('.hdf5', '.h5'):
+        return load_file_hdf5(path, prefix)
+    if ext == '.csv':
+        return {prefix or 'data': np.genfromtxt(path, delimiter=',')}
+    raise ValueError(f"不支持的数据格式: {path}")
+
+
+def load_file_hdf5(path, prefix=''):
+    import h5py
+    arrays = {}
+    with h5py.File(path, 'r') as file:
+        def visit(name, node):
+            if isinstance(node, h5py.Dataset):
+                arrays[f"{prefix}/{name}" if prefix else name] = node[()]
+        file.visititems(visit)
+    return arrays
+
+
+def load_arrays(path):
+    if os.path.isfile(path):
+        return load_file(path)
+    arrays = {}
+    for file_path in dataset_files(path):
+        arrays.update(load_file(file_path, os.path.relpath(file_path, path).replace(os.sep, '/')))
+    return arrays
+
+
+def dataset_files(path):
+    # 路径错误或文件夹中没有数据文件时直接报错，避免把空数据集当作结果缓存下来
+    if os.path.isfile(path):
+        return [path]
+    if not os.path.isdir(path):
+        raise FileNotFoundError(f"数据路径不存在: {path}")
+    files = []
+    for root, _, names in os.walk(path):
+        for name in sorted(names):
+            if name.lower().endswith(DATA_EXTENSIONS):
+                files.append(os.path.join(root, name))
+    if not files:
+        raise ValueError(f"文件夹中没有支持的数据文件（{', '.join(DATA_EXTENSIONS)}）: {path}")
+    return files
+
+
+def dataset_key(path):
+    # 文件夹的修改时间不随其中文件的原地修改而变化，因此对每个数据文件分别记录
+    path = os.path.realpath(path)
+    stamps = []
+    for file_path in dataset_files(path):
+        stat = os.stat(file_path)
+        stamps.append((os.path.relpath(file_path, path), stat.st_mtime_ns, stat.st_size))
+    return path, tuple(stamps)
+
+
+def attach_segment(name):
+    # 客户端只挂载不负责清理，避免进程退出时 resource_tracker 删除仍在使用的共享内存
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    segment = shared_memory.SharedMemory(name=name)
+    if os.name == 'posix':
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(segment._name, 'shared_memory')
+    return segment
+
+
+class DatasetServer:
+    def __init__(self, address=('127.0.0.1', 0), authkey=None, max_cache_bytes=4 << 30):
+        self.listener = Listener(address, authkey=authkey)
+        self.max_cache_bytes = max_cache_bytes  # 无引用数据集的缓存上限
+        self.datasets = {}  # dataset_key -> 共享内存块、引用计数等
+        self.loading = {}  # dataset_key -> 正在加载时的 threading.Event
+        self.lock = threading.Lock()
+
+    @property
+    def address(self):
+        return self.listener.address
+
+    def serve_forever(self):
+        while True:
+            conn = self.listener.accept()
+            threading.Thread(target=self.handle, args=(conn,), daemon=True).start()
+
+    def handle(self, conn):
+        held = {}  # 该客户端持有的引用：路径 -> [dataset_key, ...]
+        try:
+            while True:
+                op, path = conn.recv()
+                try:
+                    if op == 'acquire':
+                        key, descriptors = self.acquire(path)
+                        held.setdefault(path, []).append(key)
+                        conn.send(('ok', descriptors))
+                    elif op == 'release':
+                        if held.get(path):
+                            self.release(held[path].pop())
+                        conn.send(('ok', None))
+                    else:
+                        conn.send(('error', f"未知请求: {op}"))
+                except Exception as e:
+                    conn.send(('error', repr(e)))
+        except (EOFError, OSError):
+            pass
+        finally:
+            # 客户端退出（包括异常退出）时归还它的全部引用
+            for keys in held.values():
+                for key in keys:
+                    self.release(key)
+            conn.close()
+
+    def acquire(self, path):
+        key = dataset_key(path)
+        while True:
+            with self.lock:
+                entry = self.datasets.get(key)
+                if entry is not None:
+                    entry['refs'] += 1
+                    entry['last_used'] = time.monotonic()
+                    return key, entry['descriptors']
+                event = self.loading.get(key)
+                if event is None:
+                    event = self.loading[key] = threading.Event()
+                    break
+            # 同一数据集正在由其他连接加载，等待完成后重新查找（加载失败时由本连接重试）
+            event.wait()
+
+        # 加载可能很慢，在锁外进行，不阻塞其他数据集的获取与释放
+        try:
+            entry = self.load(key[0])
+        except Exception:
+            with self.lock:
+                del self.loading[key]
+            event.set()
+            raise
+        with self.lock:
+            entry['refs'] += 1
+            entry['last_used'] = time.monotonic()
+            self.datasets[key] = entry
+            del self.loading[key]
+        event.set()
+        return key, entry['descriptors']
+
+    def load(self, path):
+        segments = []
+        descriptors = {}
+        nbytes = 0
+        try:
+            for name, array in load_arrays(path).items():
+                array = np.asarray(array)
+                if array.dtype.hasobject:
+                    raise TypeError(f"{name} 不是数值数组，无法放入共享内存")
+                segment = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+                segments.append(segment)
+                np.ndarray(array.shape, dtype=array.dtype, buffer=segment.buf)[...] = array
+                descriptors[name] = (segment.name, array.shape, array.dtype.str)
+                nbytes += array.nbytes
+        except Exception:
+            self.unload({'segments': segments})
+            raise
+        print(f"Loaded {path} into shared memory ({nbytes / (1 << 20):.1f} MiB)", file=sys.stderr, flush=True)
+        return {'segments': segments, 'descriptors': descriptors, 'nbytes': nbytes, 'refs': 0, 'last_used': 0}
+
+    def release(self, key):
+        with self.lock:
+            entry = self.datasets.get(key)
+            if entry is None:
+                return
+            entry['refs'] = max(0, entry['refs'] - 1)
+            entry['last_used'] = time.monotonic()
+            self.evict()
+
+    def evict(self):
+        # 只淘汰无引用的数据集，按最近使用时间从旧到新，直到缓存不超过上限
+        idle = sorted((key for key, entry in self.datasets.items() if entry['refs'] == 0),
+                      key=lambda key: self.datasets[key]['last_used'])
+        cached = sum(self.datasets[key]['nbytes'] for key in idle)
+        while idle and cached > self.max_cache_bytes:
+            key = idle.pop(0)
+            cached -= self.datasets[key]['nbytes']
+            self.unload(self.datasets.pop(key))
+
+    def unload(self, entry):
+        for segment in entry['segments']:
+            segment.close()
+            segment.unlink()
+
+    def shutdown(self):
+        with self.lock:
+            for entry in self.datasets.values():
+                self.unload(entry)
+            self.datasets = {}
+        self.listener.close()
+
+
+class DatasetClient:
+    def __init__(self, address, authkey=None):
+        self.conn = Client(address, authkey=authkey)
+        self.segments = []  # 保持挂载，数组视图在进程生命周期内有效
+        self.lock = threading.Lock()
+
+    def request(self, op, path):
+        with self.lock:
+            self.conn.send((op, path))
+            status, result = self.conn.recv()
+        if status != 'ok':
+            raise RuntimeError(f"数据集服务出错: {result}")
+        return result
+
+    def acquire(self, path):
+        arrays = {}
+        for name, (segment_name, shape, dtype) in self.request('acquire', path).items():
+            segment = attach_segment(segment_name)
+            self.segments.append(segment)
+            array = np.ndarray(shape, dtype=np.dtype(dtype), buffer=segment.buf)
+            array.flags.writeable = False  # 多个运行共享同一份数据，禁止原地修改
+            arrays[name] = array
+        return arrays
+
+    def release(self, path):
+        self.request('release', path)
+
+    def close(self):
+        self.conn.close()
+
+
+_client = None
+
+
+def get_client():
+    global _client
+    if _client is None:
+        host, port = os.environ[SERVER_ENV].rsplit(':', 1)
+        authkey = bytes.fromhex(os.environ.get(AUTHKEY_ENV, ''))
+        _client = DatasetClient((host, int(port)), authkey or None)
+        atexit.register(_client.close)
+    return _client
+
+
+def load_dataset(path):
+    # 在训练脚本中使用：有数据集服务时返回共享内存中的只读零拷贝视图，否则在本进程中加载
+    if not os.environ.get(SERVER_ENV):
+        return load_arrays(path)
+    return get_client().acquire(path)
+
+
+def release_dataset(path):
+    # 提前归还引用；进程退出时服务端也会自动归还
+    if os.environ.get(SERVER_ENV):
+        get_client().release(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Shared-memory dataset server.')
+    parser.add_argument('--host', default='127.0.0.1', type=str, help='Address to listen on')
+    parser.add_argument('--port', default=0, type=int, help='Port to listen on, 0 for any free port')
+    parser.add_argument('--max_cache_gb', default=4.0, type=float, help='Cache limit for datasets no run is using')
+    args = parser.parse_args()
+
+    authkey = bytes.fromhex(os.environ.get(AUTHKEY_ENV, ''))
+    server = DatasetServer((args.host, args.port), authkey or None, int(args.max_cache_gb * (1 << 30)))
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    host, port = server.address
+    print(f"{host}:{port}", flush=True)  # 第一行输出监听地址，供启动方读取
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+import os
+import html
+from matplotlib.figure import Figure
+import matplotlib
+
+# 渲染进程不导入pyplot，只使用Agg画布；同样需要中文字体
+matplotlib.rcParams['font.sans-serif'] = ['SimHei']  # 使用黑体
+matplotlib.rcParams['axes.unicode_minus'] = False  # 用于正常显示负号
+
+
+def draw_combined_metrics(fig, epochs, metrics):
+    ax = fig.add_subplot(1, 1, 1)
+    for key, values in metrics.items():
+        if len(values) == len(epochs):
+            ax.plot(epochs, values, label=key)
+
+    ax.set_xlabel('Epoch')
+    ax.set_ylabel('Metrics')
+    ax.set_title('训练和测试指标')
+
+    step = max(1, len(epochs) // 10)
+    ax.set_xticks(epochs[::step])
+
+    ax.legend()
+    fig.tight_layout()
+
+
+def draw_separate_metrics(fig, epochs, metrics):
+    num_metrics = len(metrics)
+    num_cols = 2
+    num_rows = max(1, (num_metrics + 1) // num_cols)
+
+    axes = fig.subplots(num_rows, num_cols).flatten()
+
+    for idx, (key, values) in enumerate(metrics.items()):
+        if len(values) == len(epochs):
+            axes[idx].plot(epochs, values, label=key)
+            axes[idx].set_xlabel('Epoch')
+            axes[idx].set_ylabel(key)
+            axes[idx].set_title(key)
+
+            step = max(1, len(epochs) // 10)
+            axes[idx].set_xticks(epochs[::step])
+
+            axes[idx].legend()
+
+    for i in range(num_metrics, len(axes)):
+        fig.delaxes(axes[i])
+
+    fig.tight_layout()
+
+
+def separate_figsize(metrics):
+    return 8, 4 * max(1, (len(metrics) + 1) // 2)
+
+
+def render_run(report_dir, name, epochs, metrics):
+    # 在后台进程中运行：为单次运行写出汇总图与各指标图
+    os.makedirs(report_dir, exist_ok=True)
+    images = {'combined': f"{name}_combined.png", 'separate': f"{name}_separate.png"}
+
+    fig = Figure(figsize=(10, 6))
+    draw_combined_metrics(fig, epochs, metrics)
+    fig.savefig(os.path.join(report_dir, images['combined']))
+
+    fig = Figure(figsize=separate_figsize(metrics))
+    draw_separate_metrics(fig, epochs, metrics)
+    fig.savefig(os.path.join(report_dir, images['separate']))
+    return images
+
+
+def write_batch_report(report_dir, runs, aggregate_rows):
+    # runs: 每次运行的信息字典；aggregate_rows: ResultAggregator.rows() 的结果
+    os.makedirs(report_dir, exist_ok=True)
+    parts = ['<!DOCTYPE html>', '<html><head><meta charset="utf-8"><title>批处理报告</title>',
+             '<style>body{font-family:sans-serif}table{border-collapse:collapse}'
+             'td,th{border:1px solid #999;padding:4px 8px}img{max-width:48%}</style></head><body>',
+             '<h1>批处理报告</h1>', '<h2>跨被试汇总</h2>', '<table>',
+             '<tr><th>指标</th><th>统计量</th><th>n</th><th>mean ± std</th><th>min</th><th>max</th></tr>']
+    for row in aggregate_rows:
+        parts.append(f"<tr><td>{html.escape(row['metric'])}</td><td>{row['stat']}</td><td>{row['n']}</td>"
+                     f"<td>{row['mean']:.4f} ± {row['std']:.4f}</td><td>{row['min']:.4f}</td>"
+                     f"<td>{row['max']:.4f}</td></tr>")
+    parts.append('</table>')
+
+    for run in runs:
+        parts.append(f"<h2>运行 {run['index']}</h2>")
+        parts.append(f"<p>训练数据: {html.escape(run['train_data_path'])}<br>"
+                     f"测试数据: {html.escape(run['test_data_path'])}<br>"
+                     f"耗时: {run['duration']:.1f}s，返回码: {run['return_code']}</p>")
+        if run['return_code'] == 0:
+            name = f"run_{run['index']}"
+            images = [f"{name}_combined.png", f"{name}_separate.png"]
+            # 报告在同一进程池中排在所有渲染任务之后，渲染失败的图像不会生成
+            if all(os.path.exists(os.path.join(report_dir, image)) for image in images):
+                parts.append(' '.join(f'<img src="{image}">' for image in images))
+            else:
+                parts.append('<p>图像渲染失败</p>')
+    parts.append('</body></html>')
+
+    file_path = os.path.join(report_dir, 'index.html')
+    with open(file_path, 'w', encoding='utf-8') as file:
+        file.write('\n'.join(parts))
+    return file_path
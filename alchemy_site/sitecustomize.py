@@ -0,0 +1,20 @@
+import os
+import sys
+import importlib.util
+import importlib.machinery
+
+# 由 ScriptRunner 放在 PYTHONPATH 最前面：运行中的每个解释器（包括 spawn 子进程）启动时都会安装参数覆盖
+import alchemy_overlay
+
+alchemy_overlay.install()
+
+# 同一解释器只会导入一个 sitecustomize，继续执行原本会被导入的那一个
+_here = os.path.dirname(os.path.abspath(__file__))
+for _path in sys.path:
+    if os.path.abspath(_path or os.curdir) == _here:
+        continue
+    _spec = importlib.machinery.PathFinder.find_spec('sitecustomize', [_path])
+    if _spec is not None:
+        _module = importlib.util.module_from_spec(_spec)
+        _spec.loader.exec_module(_module)
+        break